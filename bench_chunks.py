@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from chunks import build_chunk_manifest, chunks_available, iter_chunk_ranges
+
+
+# 解析命令行参数
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='增量更新节省流量测试')
+    parser.add_argument('-s', '--points', type=int, default=1000000,
+                        help='测试模型的点数 (默认: 1000000)')
+    return parser.parse_args()
+
+
+def make_vertices(point_count, seed):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    vertices = np.zeros(point_count, dtype=[
+        ('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+        ('red', 'u1'), ('green', 'u1'), ('blue', 'u1'),
+    ])
+    vertices['x'] = rng.normal(0, 1, point_count)
+    vertices['y'] = rng.normal(0, 1, point_count)
+    vertices['z'] = rng.normal(0, 0.2, point_count)
+    vertices['red'] = rng.integers(0, 256, point_count)
+    vertices['green'] = rng.integers(0, 256, point_count)
+    vertices['blue'] = rng.integers(0, 256, point_count)
+    return vertices
+
+
+def write_ply(file_path, vertices, comment='exported by scan pipeline'):
+    header = (
+        "ply\nformat binary_little_endian 1.0\n"
+        f"comment {comment}\n"
+        f"element vertex {len(vertices)}\n"
+        "property float x\nproperty float y\nproperty float z\n"
+        "property uchar red\nproperty uchar green\nproperty uchar blue\n"
+        "end_header\n"
+    )
+    with open(file_path, 'wb') as f:
+        f.write(header.encode('ascii'))
+        f.write(vertices.tobytes())
+
+
+def edit_recolor(vertices, rng):
+    """重新着色连续区域 (1%)"""
+    edited = vertices.copy()
+    start = len(edited) // 3
+    edited['red'][start:start + len(edited) // 100] = 255
+    return edited, None
+
+
+def edit_delete(vertices, rng):
+    """删除连续的点 (0.5%)"""
+    import numpy as np
+
+    start = len(vertices) // 2
+    return np.concatenate([vertices[:start], vertices[start + len(vertices) // 200:]]), None
+
+
+def edit_insert(vertices, rng):
+    """中间插入新的点 (1%)"""
+    import numpy as np
+
+    start = len(vertices) // 4
+    extra = make_vertices(len(vertices) // 100, 99)
+    return np.concatenate([vertices[:start], extra, vertices[start:]]), None
+
+
+def edit_append(vertices, rng):
+    """末尾追加新的点 (2%)"""
+    import numpy as np
+
+    return np.concatenate([vertices, make_vertices(len(vertices) // 50, 98)]), None
+
+
+def edit_scattered(vertices, rng):
+    """分散修改的点 (0.01%)"""
+    edited = vertices.copy()
+    index = rng.choice(len(edited), max(1, len(edited) // 10000), replace=False)
+    edited['z'][index] += 0.01
+    return edited, None
+
+
+def edit_header(vertices, rng):
+    """只修改头部注释"""
+    return vertices, 're-exported by scan pipeline v2'
+
+
+# (修改, 最低节省比例)：低于该比例视为分块算法退化，脚本以非零状态退出
+EDITS = (
+    (edit_recolor, 0.9),
+    (edit_delete, 0.9),
+    (edit_insert, 0.9),
+    (edit_append, 0.9),
+    (edit_scattered, 0.7),
+    (edit_header, 0.95),
+)
+
+
+def delta_bytes(old_manifest, new_manifest):
+    """客户端持有旧版本分块时需要下载的块编号和字节数"""
+    known = {chunk_hash for chunk_hash, _ in old_manifest['chunks']}
+    missing = [index for index, (chunk_hash, _) in enumerate(new_manifest['chunks'])
+               if chunk_hash not in known]
+    return missing, sum(new_manifest['chunks'][index][1] for index in missing)
+
+
+def rebuild(old_path, old_manifest, new_path, new_manifest, missing):
+    """模拟客户端：用旧版本的分块和新下载的分块拼装新文件"""
+    with open(old_path, 'rb') as f:
+        old_data = f.read()
+    local = {}
+    offset = 0
+    for chunk_hash, length in old_manifest['chunks']:
+        local[chunk_hash] = old_data[offset:offset + length]
+        offset += length
+
+    missing = set(missing)
+    parts = []
+    with open(new_path, 'rb') as f:
+        for index, (chunk_hash, _) in enumerate(new_manifest['chunks']):
+            if index in missing:
+                parts.extend(iter_chunk_ranges(f, new_manifest, [(index, index)]))
+            else:
+                parts.append(local[chunk_hash])
+    return b''.join(parts)
+
+
+def main():
+    args = parse_arguments()
+    if not chunks_available():
+        print("错误: 需要安装numpy才能建立分块清单")
+        sys.exit(1)
+
+    import numpy as np
+
+    work_dir = tempfile.mkdtemp(prefix='chunk_bench_')
+    try:
+        vertices = make_vertices(args.points, 0)
+        old_path = os.path.join(work_dir, 'old.ply')
+        write_ply(old_path, vertices)
+
+        start = time.perf_counter()
+        old_manifest = build_chunk_manifest(old_path)
+        elapsed = time.perf_counter() - start
+        size_mb = old_manifest['size'] / 1e6
+        print(f"测试模型: {args.points} 个点, {size_mb:.1f} MB, {len(old_manifest['chunks'])} 个分块")
+        print(f"建立清单: {size_mb / elapsed:.1f} MB/秒")
+        print()
+        print(f"{'文件大小':>10}{'需下载':>10}{'节省':>7}  修改类型")
+
+        rng = np.random.default_rng(1)
+        total_size = 0
+        total_delta = 0
+        failures = []
+        for edit, min_saved in EDITS:
+            edited, comment = edit(vertices, rng)
+            new_path = os.path.join(work_dir, 'new.ply')
+            if comment:
+                write_ply(new_path, edited, comment)
+            else:
+                write_ply(new_path, edited)
+            new_manifest = build_chunk_manifest(new_path)
+            missing, delta = delta_bytes(old_manifest, new_manifest)
+
+            with open(new_path, 'rb') as f:
+                if rebuild(old_path, old_manifest, new_path, new_manifest, missing) != f.read():
+                    print(f"错误: {edit.__doc__} 重建后的文件与新文件不一致")
+                    sys.exit(1)
+
+            total_size += new_manifest['size']
+            total_delta += delta
+            saved = 1 - delta / new_manifest['size']
+            print(f"{new_manifest['size']:>14}{delta:>13}{saved:>9.1%}  {edit.__doc__}")
+            if saved < min_saved:
+                failures.append(f"{edit.__doc__} 只节省 {saved:.1%}，低于 {min_saved:.0%}")
+
+        print()
+        print(f"合计节省: {1 - total_delta / total_size:.1%}")
+        if failures:
+            for failure in failures:
+                print(f"错误: {failure}")
+            sys.exit(1)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
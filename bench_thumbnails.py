@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from thumbnails import ThumbnailCache, render_thumbnail, thumbnails_available
+
+
+# 解析命令行参数
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='缩略图生成吞吐量测试')
+    parser.add_argument('-n', '--models', type=int, default=8,
+                        help='生成的测试模型数量 (默认: 8)')
+    parser.add_argument('-s', '--points', type=int, default=1000000,
+                        help='每个测试模型的点数 (默认: 1000000)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='后台线程数 (默认: 1)')
+    return parser.parse_args()
+
+
+def write_test_model(file_path, point_count, seed):
+    """写入一个带顶点颜色的二进制PLY测试模型"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    vertices = np.zeros(point_count, dtype=[
+        ('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+        ('red', 'u1'), ('green', 'u1'), ('blue', 'u1'),
+    ])
+    theta = rng.uniform(0, 2 * np.pi, point_count)
+    height = rng.uniform(-1, 1, point_count)
+    radius = 0.5 + 0.1 * np.sin(6 * theta)
+    vertices['x'] = radius * np.cos(theta) * 3
+    vertices['y'] = radius * np.sin(theta)
+    vertices['z'] = height
+    vertices['red'] = (theta / (2 * np.pi) * 255).astype(np.uint8)
+    vertices['green'] = ((height + 1) * 127).astype(np.uint8)
+    vertices['blue'] = 180
+
+    header = (
+        "ply\nformat binary_little_endian 1.0\n"
+        f"element vertex {point_count}\n"
+        "property float x\nproperty float y\nproperty float z\n"
+        "property uchar red\nproperty uchar green\nproperty uchar blue\n"
+        "end_header\n"
+    )
+    with open(file_path, 'wb') as f:
+        f.write(header.encode('ascii'))
+        f.write(vertices.tobytes())
+
+
+def main():
+    args = parse_arguments()
+    if not thumbnails_available():
+        print("错误: 需要安装numpy才能生成缩略图")
+        sys.exit(1)
+
+    work_dir = tempfile.mkdtemp(prefix='thumbnail_bench_')
+    try:
+        model_paths = []
+        for index in range(args.models):
+            model_path = os.path.join(work_dir, f"model_{index}.ply")
+            write_test_model(model_path, args.points, index)
+            model_paths.append(model_path)
+        total_points = args.models * args.points
+        print(f"测试模型: {args.models} 个, 每个 {args.points} 个点")
+
+        start = time.perf_counter()
+        for model_path in model_paths:
+            render_thumbnail(model_path)
+        elapsed = time.perf_counter() - start
+        print(f"单线程:   {args.models / elapsed:8.2f} 张/秒, "
+              f"{total_points / elapsed / 1e6:8.2f} M点/秒")
+
+        cache = ThumbnailCache(workers=args.workers)
+        start = time.perf_counter()
+        futures = [cache.submit(model_path)[2] for model_path in model_paths]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        print(f"后台线程: {args.models / elapsed:8.2f} 张/秒, "
+              f"{total_points / elapsed / 1e6:8.2f} M点/秒")
+
+        start = time.perf_counter()
+        for model_path in model_paths:
+            cache.get(model_path)
+        elapsed = time.perf_counter() - start
+        print(f"缓存命中: {elapsed / args.models * 1000:8.3f} 毫秒/张")
+        cache.shutdown()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
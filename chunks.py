@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖，缺失时增量更新功能不可用
+    np = None
+
+from model_cache import ModelFileCache
+
+
+CHUNK_MIN_SIZE = 4 * 1024
+CHUNK_AVG_BITS = 14  # 平均块大小约 16KB
+CHUNK_MAX_SIZE = 64 * 1024
+CHUNK_WINDOW = 48
+CHUNK_BLOCK_SIZE = 512 * 1024  # 每块约需 2 个 4MB 的临时数组
+CHUNK_READ_SIZE = 1024 * 1024
+CHUNK_HASH_SIZE = 16
+CHUNK_CACHE_DIRNAME = '.chunks'
+CHUNK_VERSION_TAG = f"sha256:{CHUNK_MIN_SIZE}:{CHUNK_AVG_BITS}:{CHUNK_MAX_SIZE}:{CHUNK_WINDOW}:{CHUNK_HASH_SIZE}"
+CHUNK_RANGE_PATTERN = re.compile(r'^(\d+)(?:-(\d+))?$')
+
+_GEAR = None
+_POWERS = None
+
+
+def chunks_available():
+    return np is not None
+
+
+def _rolling_tables():
+    """返回字节随机映射表以及滚动哈希用的 P^k、P^-k 表（均按 2^64 取模）"""
+    global _GEAR, _POWERS
+    if _GEAR is None:
+        _GEAR = np.array([
+            int.from_bytes(hashlib.blake2b(bytes([value]), digest_size=8).digest(), 'little')
+            for value in range(256)
+        ], dtype=np.uint64)
+    if _POWERS is None or len(_POWERS[0]) < CHUNK_BLOCK_SIZE + CHUNK_WINDOW:
+        prime = 0x100000001b3
+        length = CHUNK_BLOCK_SIZE + CHUNK_WINDOW
+        powers = np.full(length, prime, dtype=np.uint64)
+        powers[0] = 1
+        inverse = np.full(length, pow(prime, -1, 2 ** 64), dtype=np.uint64)
+        inverse[0] = 1
+        _POWERS = (np.cumprod(powers, dtype=np.uint64), np.cumprod(inverse, dtype=np.uint64))
+    return _GEAR, _POWERS
+
+
+def find_chunk_boundaries(data):
+    """基于内容的分块：返回每个块的结束偏移量
+
+    滚动哈希只取决于最近 CHUNK_WINDOW 个字节，所以插入或删除数据后，
+    分块边界会在变化位置之后重新对齐，未修改的内容仍然得到相同的块。
+    """
+    size = len(data)
+    if size == 0:
+        return []
+
+    gear, (powers, inverse) = _rolling_tables()
+    window = CHUNK_WINDOW
+    threshold = np.uint64(64 - CHUNK_AVG_BITS)
+    candidates = []
+    for start in range(0, size, CHUNK_BLOCK_SIZE):
+        end = min(start + CHUNK_BLOCK_SIZE, size)
+        context = min(window - 1, start)
+        prefix = gear[np.asarray(data[start - context:end])]
+        count = len(prefix)
+
+        # 窗口哈希 h[i] = Σ g[k]·P^(i-k) = P^i·(S[i] - S[i-W])，其中 S 为 g[k]·P^-k 的前缀和
+        # 全部原地计算，每块只分配 prefix 和 hashes 两个数组
+        np.multiply(prefix, inverse[:count], out=prefix)
+        np.cumsum(prefix, dtype=np.uint64, out=prefix)
+        hashes = np.empty(count, dtype=np.uint64)
+        hashes[:window] = prefix[:window]
+        np.subtract(prefix[window:], prefix[:-window], out=hashes[window:])
+        del prefix
+        np.multiply(hashes, powers[:count], out=hashes)
+        np.right_shift(hashes, threshold, out=hashes)
+
+        positions = np.flatnonzero(hashes == 0)
+        del hashes
+        positions = positions[positions >= window - 1]
+        candidates.append(positions + (start - context + 1))
+    candidates = np.concatenate(candidates)
+
+    boundaries = []
+    last = 0
+    while last < size:
+        lower = last + CHUNK_MIN_SIZE
+        upper = min(last + CHUNK_MAX_SIZE, size)
+        index = np.searchsorted(candidates, lower)
+        if lower < size and index < len(candidates) and candidates[index] <= upper:
+            last = int(candidates[index])
+        else:
+            last = upper
+        boundaries.append(last)
+    return boundaries
+
+
+def chunk_digest(data):
+    """截断的SHA-256，浏览器可以用 crypto.subtle 计算同样的值来校验下载的分块"""
+    return hashlib.sha256(data).hexdigest()[:CHUNK_HASH_SIZE * 2]
+
+
+def build_chunk_manifest(file_path, version=None):
+    """生成模型文件的分块清单：{'version', 'size', 'chunks': [[哈希, 长度], ...]}"""
+    size = os.path.getsize(file_path)
+    chunks = []
+    if size > 0:
+        mapped = np.memmap(file_path, dtype=np.uint8, mode='r')
+        try:
+            offset = 0
+            for boundary in find_chunk_boundaries(mapped):
+                chunks.append([chunk_digest(mapped[offset:boundary]), boundary - offset])
+                offset = boundary
+        finally:
+            # 及时释放映射，避免在Windows上锁住模型文件
+            del mapped
+    return {'version': version, 'size': size, 'chunks': chunks}
+
+
+def parse_chunk_ranges(value, chunk_count):
+    """解析 "0-3,7,9-12" 形式的块编号列表，返回 [(起始编号, 结束编号)] 的闭区间
+
+    区间必须严格递增且互不重叠，避免一次请求让服务器重复读取同一段数据。
+    """
+    ranges = []
+    previous = -1
+    for part in (value or '').split(','):
+        match = CHUNK_RANGE_PATTERN.match(part)
+        if match is None:
+            raise ValueError(f"Invalid chunk range: {part}")
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) is not None else first
+        if first <= previous or last < first or last >= chunk_count:
+            raise ValueError(f"Invalid chunk range: {part}")
+        ranges.append((first, last))
+        previous = last
+    return ranges
+
+
+def chunk_offsets(manifest):
+    """返回每个块的起始偏移量，最后一项为文件大小"""
+    offsets = [0]
+    for _, length in manifest['chunks']:
+        offsets.append(offsets[-1] + length)
+    return offsets
+
+
+def iter_chunk_ranges(f, manifest, ranges):
+    """从已打开的模型文件中按顺序逐段读取指定块，不在内存中拼接整个响应"""
+    offsets = chunk_offsets(manifest)
+    for first, last in ranges:
+        f.seek(offsets[first])
+        remaining = offsets[last + 1] - offsets[first]
+        while remaining > 0:
+            data = f.read(min(remaining, CHUNK_READ_SIZE))
+            if not data:
+                raise IOError("Model file is shorter than its chunk manifest")
+            remaining -= len(data)
+            yield data
+
+
+class ChunkIndexCache(ModelFileCache):
+    """在后台线程中为模型建立分块清单，并按模型的修改时间缓存到模型旁的 .chunks 目录"""
+
+    cache_dirname = CHUNK_CACHE_DIRNAME
+    suffix = '.json'
+
+    def version_tag(self):
+        return CHUNK_VERSION_TAG
+
+    def build(self, model_path, key):
+        return json.dumps(build_chunk_manifest(model_path, key), separators=(',', ':')).encode()
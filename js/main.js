@@ -1016,8 +1016,42 @@ function createModelSelector() {
     tipInfo.style.marginBottom = '8px';
     tipInfo.style.textAlign = 'center';
     
+    // 添加缩略图预览（服务器支持时才显示）
+    const thumbnailGrid = document.createElement('div');
+    thumbnailGrid.classList.add('model-thumbnails');
+    thumbnailGrid.style.display = 'grid';
+    thumbnailGrid.style.gridTemplateColumns = 'repeat(3, 64px)';
+    thumbnailGrid.style.gap = '6px';
+    thumbnailGrid.style.maxHeight = '220px';
+    thumbnailGrid.style.overflowY = 'auto';
+    thumbnailGrid.style.marginBottom = '10px';
+    
+    availableModels.forEach(model => {
+        if (!model.thumbnail) return;
+        
+        const thumbnail = document.createElement('img');
+        thumbnail.alt = model.name;
+        thumbnail.title = model.name;
+        thumbnail.style.width = '64px';
+        thumbnail.style.height = '64px';
+        thumbnail.style.backgroundColor = 'rgba(60, 60, 67, 0.7)';
+        thumbnail.style.border = '1px solid rgba(255, 255, 255, 0.2)';
+        thumbnail.style.borderRadius = '6px';
+        thumbnail.style.cursor = 'pointer';
+        thumbnail.addEventListener('click', function() {
+            if (selector.value === model.path) return;
+            selector.value = model.path;
+            selector.dispatchEvent(new Event('change'));
+        });
+        thumbnailGrid.appendChild(thumbnail);
+        loadModelThumbnail(thumbnail, model.thumbnail, 0);
+    });
+    
     modelPanel.appendChild(tipInfo);
     modelPanel.appendChild(selector);
+    if (thumbnailGrid.children.length > 0) {
+        modelPanel.appendChild(thumbnailGrid);
+    }
     modelPanel.appendChild(refreshBtn);
     document.body.appendChild(modelPanel);
     
@@ -1032,6 +1066,228 @@ function createModelSelector() {
     }
 }
 
+const THUMBNAIL_MAX_ATTEMPTS = 10;
+const THUMBNAIL_MAX_RETRY_DELAY = 30;
+
+// 加载模型缩略图，服务器返回202表示仍在后台生成，按指数退避稍后重试
+function loadModelThumbnail(img, url, attempt) {
+    fetch(url)
+        .then(response => {
+            if (response.status === 202) {
+                if (attempt + 1 >= THUMBNAIL_MAX_ATTEMPTS) {
+                    throw new Error('缩略图生成超时');
+                }
+                if (img.isConnected !== false) {
+                    const retryAfter = parseFloat(response.headers.get('Retry-After')) || 1;
+                    const delay = Math.min(retryAfter * Math.pow(2, attempt), THUMBNAIL_MAX_RETRY_DELAY);
+                    setTimeout(() => loadModelThumbnail(img, url, attempt + 1), delay * 1000);
+                }
+                return null;
+            }
+            if (!response.ok) {
+                throw new Error('获取缩略图失败: ' + response.status);
+            }
+            return response.blob();
+        })
+        .then(blob => {
+            if (!blob) return;
+            const objectUrl = URL.createObjectURL(blob);
+            img.onload = () => URL.revokeObjectURL(objectUrl);
+            img.src = objectUrl;
+        })
+        .catch(error => {
+            console.warn('缩略图加载失败:', url, error);
+            img.style.opacity = '0.3';
+        });
+}
+
+// 增量更新：在IndexedDB中按哈希保存模型分块，重新导出的模型只下载变化的分块
+const CHUNK_DB_NAME = 'ply-model-chunks';
+const CHUNK_RANGES_PER_REQUEST = 200;
+const CHUNK_HASH_BYTES = 16;  // 与服务器 chunks.py 中的 CHUNK_HASH_SIZE 一致
+
+function openChunkStore() {
+    return new Promise((resolve, reject) => {
+        if (!window.indexedDB) {
+            reject(new Error('浏览器不支持IndexedDB'));
+            return;
+        }
+        const request = indexedDB.open(CHUNK_DB_NAME, 1);
+        request.onupgradeneeded = () => {
+            request.result.createObjectStore('chunks');     // 分块哈希 -> 分块数据
+            request.result.createObjectStore('manifests');  // 模型路径 -> 分块哈希列表
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function idbRequest(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+// 获取分块清单；服务器返回202表示清单仍在后台生成，此时不等待，直接完整下载
+function fetchChunkManifest(url) {
+    return fetch(url).then(response => {
+        if (response.status === 202) {
+            throw new Error('分块清单仍在生成');
+        }
+        if (response.status !== 200) {
+            throw new Error('获取分块清单失败: ' + response.status);
+        }
+        return response.json();
+    });
+}
+
+// 计算分块的截断SHA-256，与清单中的哈希比较
+function digestChunk(bytes) {
+    return crypto.subtle.digest('SHA-256', bytes).then(digest =>
+        Array.from(new Uint8Array(digest, 0, CHUNK_HASH_BYTES), byte => byte.toString(16).padStart(2, '0')).join(''));
+}
+
+// 保存新下载的分块，并删除不再被任何模型引用的分块
+function storeModelChunks(db, modelPath, manifest, output, offsets, missing) {
+    const tx = db.transaction(['chunks', 'manifests'], 'readwrite');
+    const chunkStore = tx.objectStore('chunks');
+    const manifestStore = tx.objectStore('manifests');
+    missing.forEach(index => {
+        const [hash, length] = manifest.chunks[index];
+        chunkStore.put(output.slice(offsets[index], offsets[index] + length).buffer, hash);
+    });
+    manifestStore.put(manifest.chunks.map(([hash]) => hash), modelPath);
+    
+    idbRequest(manifestStore.getAll()).then(hashLists => {
+        const referenced = new Set();
+        hashLists.forEach(hashes => hashes.forEach(hash => referenced.add(hash)));
+        return idbRequest(chunkStore.getAllKeys()).then(keys => {
+            keys.forEach(key => {
+                if (!referenced.has(key)) chunkStore.delete(key);
+            });
+        });
+    });
+    
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onerror = () => reject(tx.error);
+    });
+}
+
+// 按清单拼装模型文件：本地已有的分块直接使用，缺失的分块按编号区间批量下载
+function loadModelDelta(modelPath, onProgress) {
+    const model = availableModels.find(item => item.path === modelPath);
+    if (!model || !model.manifest) {
+        return Promise.reject(new Error('服务器不支持增量更新'));
+    }
+    // crypto.subtle 只在HTTPS或localhost下可用，无法校验分块时直接完整下载
+    if (!window.crypto || !window.crypto.subtle) {
+        return Promise.reject(new Error('浏览器无法校验分块哈希'));
+    }
+    
+    let db, manifest;
+    return Promise.all([openChunkStore(), fetchChunkManifest(model.manifest)])
+        .then(([store, result]) => {
+            db = store;
+            manifest = result;
+            const chunkStore = db.transaction('chunks', 'readonly').objectStore('chunks');
+            return Promise.all(manifest.chunks.map(([hash]) => idbRequest(chunkStore.get(hash))));
+        })
+        .then(cachedChunks => {
+            const output = new Uint8Array(manifest.size);
+            const offsets = [];
+            const missing = [];
+            let offset = 0;
+            manifest.chunks.forEach(([, length], index) => {
+                offsets.push(offset);
+                const cached = cachedChunks[index];
+                if (cached && cached.byteLength === length) {
+                    output.set(new Uint8Array(cached), offset);
+                } else {
+                    missing.push(index);
+                }
+                offset += length;
+            });
+            
+            // 将连续的缺失分块合并为区间
+            const ranges = [];
+            missing.forEach(index => {
+                const last = ranges[ranges.length - 1];
+                if (last && last[1] === index - 1) {
+                    last[1] = index;
+                } else {
+                    ranges.push([index, index]);
+                }
+            });
+            
+            const total = missing.reduce((sum, index) => sum + manifest.chunks[index][1], 0);
+            console.log(`增量更新: 共 ${manifest.chunks.length} 个分块，需要下载 ${missing.length} 个 (${total} / ${manifest.size} 字节)`);
+            
+            const chunksUrl = model.manifest.replace(/manifest$/, 'chunks');
+            let loaded = 0;
+            let batches = Promise.resolve();
+            for (let i = 0; i < ranges.length; i += CHUNK_RANGES_PER_REQUEST) {
+                const batch = ranges.slice(i, i + CHUNK_RANGES_PER_REQUEST);
+                const ids = batch.map(([first, last]) => first === last ? `${first}` : `${first}-${last}`).join(',');
+                batches = batches
+                    .then(() => fetch(`${chunksUrl}?version=${encodeURIComponent(manifest.version)}&ids=${ids}`))
+                    .then(response => {
+                        if (response.status !== 200) {
+                            throw new Error('获取模型分块失败: ' + response.status);
+                        }
+                        return response.arrayBuffer();
+                    })
+                    .then(buffer => {
+                        const data = new Uint8Array(buffer);
+                        const checks = [];
+                        let position = 0;
+                        batch.forEach(([first, last]) => {
+                            for (let index = first; index <= last; index++) {
+                                const [hash, length] = manifest.chunks[index];
+                                if (position + length > data.length) {
+                                    throw new Error('模型分块数据不完整');
+                                }
+                                // 逐块校验哈希后才写入，校验失败时退回完整下载
+                                const chunk = data.subarray(position, position + length);
+                                const start = offsets[index];
+                                checks.push(digestChunk(chunk).then(digest => {
+                                    if (digest !== hash) {
+                                        throw new Error(`模型分块 ${index} 校验失败`);
+                                    }
+                                    output.set(chunk, start);
+                                }));
+                                position += length;
+                            }
+                        });
+                        if (position !== data.length) {
+                            throw new Error('模型分块数据长度不一致');
+                        }
+                        return Promise.all(checks).then(() => {
+                            loaded += position;
+                            onProgress({ loaded: loaded, total: total });
+                        });
+                    });
+            }
+            
+            return batches.then(() => {
+                storeModelChunks(db, modelPath, manifest, output, offsets, missing)
+                    .catch(error => console.warn('保存模型分块失败:', error));
+                return output.buffer;
+            });
+        });
+}
+
+// 优先通过增量更新加载模型，失败时退回到完整下载
+function loadModelData(loader, modelPath, onLoad, onProgress, onError) {
+    loadModelDelta(modelPath, onProgress)
+        .then(buffer => loader.parse(buffer))
+        .then(onLoad, error => {
+            console.warn('增量更新不可用，改为完整下载:', error);
+            loader.load(modelPath, onLoad, onProgress, onError);
+        });
+}
+
 // 切换模型
 function changeModel(modelPath) {
     currentModelPath = modelPath;
@@ -2147,7 +2403,8 @@ function loadModel(modelPath) {
     });
     
     // 加载新模型
-    loader.load(
+    loadModelData(
+        loader,
         modelPath,
         function(geometry) {
             console.timeEnd("模型加载和处理");
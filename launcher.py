@@ -277,6 +277,9 @@ class PLYViewerLauncher:
         if self.server_thread and self.server_thread.is_alive():
             self.server_thread.join(2.0)  # 最多等待2秒
         
+        # 取消排队中的后台任务，避免切换文件夹后旧目录的队列继续运行
+        ModelServerHandler.shutdown_caches()
+        
         self.status_var.set("已停止")
         self.log_message("服务器已停止")
         
@@ -293,6 +296,7 @@ class PLYViewerLauncher:
     def handle_server_stop(self):
         """处理服务器停止事件"""
         self.running = False
+        ModelServerHandler.shutdown_caches()
         self.status_var.set("已停止")
         self.log_message("服务器意外停止")
         
@@ -0,0 +1,108 @@
+import concurrent.futures
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+
+
+class ModelFileCache:
+    """在后台线程中为模型生成派生文件，并按模型的修改时间缓存到模型旁的目录"""
+
+    cache_dirname = None
+    suffix = None
+
+    def __init__(self, workers=1):
+        # 生成过程受GIL限制，多个线程并不能提高吞吐量，默认只用一个后台线程
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=self.cache_dirname.strip('.'))
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def version_tag(self):
+        """影响生成结果的参数，参数变化后缓存键随之改变"""
+        return ''
+
+    def build(self, model_path, key):
+        raise NotImplementedError
+
+    def _cache_dir(self, model_path):
+        cache_dir = os.path.join(os.path.dirname(model_path), self.cache_dirname)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            # 模型目录不可写时退回到系统临时目录
+            cache_dir = os.path.join(tempfile.gettempdir(), 'ply_viewer' + self.cache_dirname)
+            os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
+    def cache_key(self, model_path, stat):
+        """根据模型路径和 os.stat 结果计算缓存键，模型的修改时间或大小变化后缓存键随之改变"""
+        model_path = os.path.realpath(model_path)
+        model_id = hashlib.sha1(model_path.encode('utf-8')).hexdigest()[:16]
+        version = hashlib.sha1(
+            f"{stat.st_mtime_ns}:{stat.st_size}:{self.version_tag()}".encode()
+        ).hexdigest()[:16]
+        return f"{model_id}-{version}"
+
+    def cache_entry(self, model_path):
+        """返回 (缓存键, 缓存文件路径)"""
+        model_path = os.path.realpath(model_path)
+        key = self.cache_key(model_path, os.stat(model_path))
+        return key, os.path.join(self._cache_dir(model_path), key + self.suffix)
+
+    def _generate(self, model_path, key, cache_file):
+        data = self.build(model_path, key)
+        temp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+        os.replace(temp_file, cache_file)
+
+        # 清理同一模型的旧版本缓存
+        model_id = key.split('-')[0]
+        pattern = os.path.join(os.path.dirname(cache_file), model_id + '-*' + self.suffix)
+        for stale in glob.glob(pattern):
+            if stale != cache_file:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+        with self._lock:
+            self._pending.pop(key, None)
+        return data
+
+    def submit(self, model_path):
+        """确保缓存已存在或正在生成，返回 (缓存键, 缓存文件路径, future或None)"""
+        key, cache_file = self.cache_entry(model_path)
+        if os.path.exists(cache_file):
+            return key, cache_file, None
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                # 生成失败的任务保留在表中，直到模型文件更新后才会重试
+                future = self._executor.submit(self._generate, model_path, key, cache_file)
+                self._pending[key] = future
+        return key, cache_file, future
+
+    def prefetch(self, model_paths):
+        for model_path in model_paths:
+            try:
+                self.submit(model_path)
+            except OSError:
+                pass
+
+    def get(self, model_path, timeout=0):
+        """返回 (缓存键, 缓存数据)；在超时前仍未生成完时缓存数据为None"""
+        key, cache_file, future = self.submit(model_path)
+        if future is not None:
+            try:
+                return key, future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                return key, None
+        with open(cache_file, 'rb') as f:
+            return key, f.read()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""缩略图与增量更新的自检，运行: python self_test.py"""
+import json
+import os
+import shutil
+import socketserver
+import struct
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import chunks
+from chunks import (ChunkIndexCache, build_chunk_manifest, chunk_digest, chunk_offsets,
+                    chunks_available, find_chunk_boundaries, iter_chunk_ranges,
+                    parse_chunk_ranges)
+from model_cache import ModelFileCache
+from server_common import ModelServerHandler
+from thumbnails import read_ply_points, render_thumbnail, thumbnails_available
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+HEADER = "ply\nformat {fmt} 1.0\n{elements}end_header\n"
+VERTEX_ELEMENT = (
+    "element vertex {count}\n"
+    "property float x\nproperty float y\nproperty float z\n"
+    "property uchar red\nproperty uchar green\nproperty uchar blue\n"
+)
+POINTS = [(0.0, 0.0, 0.0, 255, 0, 0), (1.0, 0.0, 0.0, 0, 255, 0),
+          (0.0, 2.0, 0.0, 0, 0, 255), (1.0, 2.0, 0.5, 10, 20, 30)]
+
+
+@unittest.skipUnless(thumbnails_available(), "需要安装numpy")
+class PlyReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='ply_self_test_')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write(self, data):
+        file_path = os.path.join(self.work_dir, 'model.ply')
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        return file_path
+
+    def binary(self, order, elements_before='', data_before=b''):
+        header = HEADER.format(fmt='binary_little_endian' if order == '<' else 'binary_big_endian',
+                               elements=elements_before + VERTEX_ELEMENT.format(count=len(POINTS)))
+        body = b''.join(struct.pack(order + 'fffBBB', *point) for point in POINTS)
+        return header.encode('ascii') + data_before + body
+
+    def check_points(self, file_path):
+        points, colors = read_ply_points(file_path)
+        np.testing.assert_allclose(points, [point[:3] for point in POINTS])
+        np.testing.assert_array_equal(colors, [point[3:] for point in POINTS])
+
+    def test_ascii(self):
+        header = HEADER.format(fmt='ascii', elements=VERTEX_ELEMENT.format(count=len(POINTS)))
+        body = ''.join(' '.join(str(value) for value in point) + '\n' for point in POINTS)
+        self.check_points(self.write((header + body).encode('ascii')))
+
+    def test_binary_little_endian(self):
+        self.check_points(self.write(self.binary('<')))
+
+    def test_binary_big_endian(self):
+        self.check_points(self.write(self.binary('>')))
+
+    def test_fixed_size_element_before_vertices(self):
+        elements = "element camera 2\nproperty float fov\nproperty uchar id\n"
+        data = struct.pack('<fBfB', 1.0, 1, 2.0, 2)
+        self.check_points(self.write(self.binary('<', elements, data)))
+
+    def test_list_element_before_vertices(self):
+        elements = "element face 1\nproperty list uchar int vertex_indices\n"
+        with self.assertRaises(ValueError):
+            read_ply_points(self.write(self.binary('<', elements, struct.pack('<Biii', 3, 0, 1, 2))))
+
+    def test_list_element_before_vertices_ascii(self):
+        elements = "element face 1\nproperty list uchar int vertex_indices\n"
+        header = HEADER.format(fmt='ascii', elements=elements + VERTEX_ELEMENT.format(count=len(POINTS)))
+        body = '3 0 1 2\n' + ''.join(' '.join(str(value) for value in point) + '\n' for point in POINTS)
+        self.check_points(self.write((header + body).encode('ascii')))
+
+    def test_list_property_on_vertices(self):
+        header = HEADER.format(fmt='binary_little_endian',
+                               elements="element vertex 1\nproperty list uchar float x\n")
+        with self.assertRaises(ValueError):
+            read_ply_points(self.write(header.encode('ascii') + b'\x01\x00\x00\x00\x00'))
+
+    def test_no_vertices(self):
+        header = HEADER.format(fmt='binary_little_endian', elements=VERTEX_ELEMENT.format(count=0))
+        with self.assertRaises(ValueError):
+            read_ply_points(self.write(header.encode('ascii')))
+
+    def test_zero_byte_file(self):
+        with self.assertRaises(ValueError):
+            read_ply_points(self.write(b''))
+
+    def test_unterminated_header(self):
+        with self.assertRaises(ValueError):
+            read_ply_points(self.write(b'ply\nformat ascii 1.0\n'))
+
+    def test_render_thumbnail(self):
+        data = render_thumbnail(self.write(self.binary('<')), size=32)
+        self.assertTrue(data.startswith(b'\x89PNG\r\n\x1a\n'))
+        self.assertEqual(struct.unpack('>II', data[16:24]), (32, 32))
+
+
+class CountingCache(ModelFileCache):
+    """记录生成次数的缓存；设置 release 后生成会阻塞到事件被触发，设置 fail 后生成失败"""
+
+    cache_dirname = '.self_test'
+    suffix = '.bin'
+
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+        self.release = None
+        self.fail = False
+
+    def build(self, model_path, key):
+        self.builds += 1
+        if self.release is not None:
+            self.release.wait(5)
+        if self.fail:
+            raise ValueError("build failed")
+        with open(model_path, 'rb') as f:
+            return f.read()
+
+
+class ModelFileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='cache_self_test_')
+        self.model_path = os.path.join(self.work_dir, 'model.ply')
+        with open(self.model_path, 'wb') as f:
+            f.write(b'version 1')
+        self.cache = CountingCache()
+
+    def tearDown(self):
+        self.cache.shutdown()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def cache_files(self):
+        return sorted(os.listdir(os.path.join(self.work_dir, CountingCache.cache_dirname)))
+
+    def test_cached_until_model_changes(self):
+        key, data = self.cache.get(self.model_path, timeout=5)
+        self.assertEqual(data, b'version 1')
+        self.assertEqual(self.cache.get(self.model_path), (key, b'version 1'))
+        self.assertEqual(self.cache.builds, 1)
+
+        stat = os.stat(self.model_path)
+        os.utime(self.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        new_key, _ = self.cache.get(self.model_path, timeout=5)
+        self.assertNotEqual(new_key, key)
+        self.assertEqual(self.cache.builds, 2)
+        # 旧版本的缓存文件被清理，只剩当前版本
+        self.assertEqual(self.cache_files(), [new_key + '.bin'])
+
+    def test_size_change_invalidates(self):
+        key, _ = self.cache.get(self.model_path, timeout=5)
+        stat = os.stat(self.model_path)
+        with open(self.model_path, 'wb') as f:
+            f.write(b'version 22')
+        os.utime(self.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        new_key, data = self.cache.get(self.model_path, timeout=5)
+        self.assertNotEqual(new_key, key)
+        self.assertEqual(data, b'version 22')
+        self.assertEqual(self.cache_files(), [new_key + '.bin'])
+
+    def test_failed_build_not_retried_until_model_changes(self):
+        self.cache.fail = True
+        with self.assertRaises(ValueError):
+            self.cache.get(self.model_path, timeout=5)
+        with self.assertRaises(ValueError):
+            self.cache.get(self.model_path, timeout=5)
+        self.assertEqual(self.cache.builds, 1)
+
+        self.cache.fail = False
+        stat = os.stat(self.model_path)
+        os.utime(self.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertEqual(self.cache.get(self.model_path, timeout=5)[1], b'version 1')
+        self.assertEqual(self.cache.builds, 2)
+
+    def test_pending_returns_immediately(self):
+        self.cache.release = threading.Event()
+        key, data = self.cache.get(self.model_path)
+        self.assertIsNone(data)
+        self.cache.release.set()
+        self.assertEqual(self.cache.get(self.model_path, timeout=5), (key, b'version 1'))
+
+
+class HandlerTestCase(unittest.TestCase):
+    """在后台线程中启动真实的服务器，按HTTP请求检查响应状态"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='handler_self_test_')
+        self.handler = type('Handler', (ModelServerHandler,), {
+            'models_directory': self.work_dir,
+            'search_roots': [self.work_dir],
+            'log_message': lambda handler, format, *args: None,
+        })
+        self.httpd = socketserver.TCPServer(('127.0.0.1', 0), self.handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.handler.shutdown_caches()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def request(self, path, headers=None):
+        url = f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+
+@unittest.skipUnless(thumbnails_available(), "需要安装numpy")
+class ThumbnailHandlerTest(HandlerTestCase):
+    def setUp(self):
+        super().setUp()
+        with open(os.path.join(self.work_dir, 'model.ply'), 'wb') as f:
+            f.write(b'not rendered')
+        self.cache = CountingCache()
+        self.cache.release = threading.Event()
+        self.handler.thumbnail_cache = self.cache
+
+    def test_pending_then_etag(self):
+        status, headers, _ = self.request('/api/models/model.ply/thumbnail')
+        self.assertEqual(status, 202)
+        self.assertEqual(headers['Retry-After'], '1')
+
+        self.cache.release.set()
+        self.cache.get(os.path.join(self.work_dir, 'model.ply'), timeout=5)
+        status, headers, body = self.request('/api/models/model.ply/thumbnail')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'not rendered')
+        etag = headers['ETag']
+
+        status, _, body = self.request('/api/models/model.ply/thumbnail', {'If-None-Match': etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b'')
+
+    def test_missing_model(self):
+        self.assertEqual(self.request('/api/models/missing.ply/thumbnail')[0], 404)
+
+    def test_shutdown_caches(self):
+        self.handler.shutdown_caches()
+        self.assertIsNone(self.handler.thumbnail_cache)
+        self.cache.release.set()
+
+
+@unittest.skipUnless(chunks_available(), "需要安装numpy")
+class ChunkTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='chunk_self_test_')
+        self.data = np.random.default_rng(0).integers(0, 256, 3 * 1024 * 1024, dtype=np.uint8)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write(self, data):
+        file_path = os.path.join(self.work_dir, 'model.ply')
+        with open(file_path, 'wb') as f:
+            f.write(bytes(data))
+        return file_path
+
+    def test_chunk_sizes(self):
+        boundaries = find_chunk_boundaries(self.data)
+        self.assertEqual(boundaries[-1], len(self.data))
+        sizes = np.diff([0] + boundaries)
+        self.assertTrue((sizes[:-1] >= chunks.CHUNK_MIN_SIZE).all())
+        self.assertTrue((sizes <= chunks.CHUNK_MAX_SIZE).all())
+
+    def test_boundaries_independent_of_block_size(self):
+        expected = find_chunk_boundaries(self.data)
+        original = chunks.CHUNK_BLOCK_SIZE
+        try:
+            for block_size in (4099, 100003, 4 * 1024 * 1024):
+                chunks.CHUNK_BLOCK_SIZE = block_size
+                self.assertEqual(find_chunk_boundaries(self.data), expected)
+        finally:
+            chunks.CHUNK_BLOCK_SIZE = original
+
+    def test_boundaries_resync_after_insert(self):
+        edited = np.concatenate([self.data[:1000000], self.data[:1234], self.data[1000000:]])
+        old = build_chunk_manifest(self.write(self.data))
+        local = {}
+        offset = 0
+        for chunk_hash, length in old['chunks']:
+            local[chunk_hash] = bytes(self.data[offset:offset + length])
+            offset += length
+
+        file_path = self.write(edited)
+        new = build_chunk_manifest(file_path)
+        missing = [index for index, (chunk_hash, _) in enumerate(new['chunks'])
+                   if chunk_hash not in local]
+        changed = sum(new['chunks'][index][1] for index in missing)
+        self.assertLess(changed, 4 * chunks.CHUNK_MAX_SIZE)
+
+        # 用旧分块加上下载的缺失分块拼装，结果应与新文件逐字节一致
+        parts = []
+        with open(file_path, 'rb') as f:
+            for index, (chunk_hash, _) in enumerate(new['chunks']):
+                if index in missing:
+                    parts.extend(iter_chunk_ranges(f, new, [(index, index)]))
+                else:
+                    parts.append(local[chunk_hash])
+        self.assertEqual(b''.join(parts), bytes(edited))
+
+    def test_small_and_empty_data(self):
+        self.assertEqual(find_chunk_boundaries(np.zeros(0, dtype=np.uint8)), [])
+        self.assertEqual(find_chunk_boundaries(self.data[:10]), [10])
+        self.assertEqual(build_chunk_manifest(self.write(b''))['chunks'], [])
+
+    def test_rebuild_from_ranges(self):
+        file_path = self.write(self.data)
+        manifest = build_chunk_manifest(file_path)
+        count = len(manifest['chunks'])
+        with open(file_path, 'rb') as f:
+            data = b''.join(iter_chunk_ranges(f, manifest, [(0, count - 1)]))
+        self.assertEqual(data, bytes(self.data))
+        self.assertEqual(manifest['size'], len(self.data))
+
+    def test_parse_chunk_ranges(self):
+        self.assertEqual(parse_chunk_ranges('0-3,7,9-12', 20), [(0, 3), (7, 7), (9, 12)])
+        for value in ('', '0-1,0-1', '3,3', '5,2', '2-4,4', '3-', '-3', '4-2', 'a', '0-20', '1,,2'):
+            with self.assertRaises(ValueError, msg=value):
+                parse_chunk_ranges(value, 20)
+
+
+class BlockingChunkIndexCache(ChunkIndexCache):
+    """在 release 事件触发前不会完成清单的生成"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def build(self, model_path, key):
+        self.release.wait(5)
+        return super().build(model_path, key)
+
+
+@unittest.skipUnless(chunks_available(), "需要安装numpy")
+class ChunkHandlerTest(HandlerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.model_path = os.path.join(self.work_dir, 'model.ply')
+        with open(self.model_path, 'wb') as f:
+            f.write(np.random.default_rng(0).integers(0, 256, 200000, dtype=np.uint8).tobytes())
+        self.cache = BlockingChunkIndexCache()
+        self.handler.chunk_index_cache = self.cache
+
+    def tearDown(self):
+        self.cache.release.set()
+        super().tearDown()
+
+    def manifest(self):
+        self.cache.release.set()
+        return json.loads(self.cache.get(self.model_path, timeout=5)[1])
+
+    def request_chunks(self, query):
+        return self.request('/api/models/model.ply/chunks?' + query)
+
+    def test_pending_manifest(self):
+        key, _ = self.cache.cache_entry(self.model_path)
+        status, headers, _ = self.request_chunks(f'version={key}&ids=0')
+        self.assertEqual(status, 202)
+        self.assertEqual(headers['Retry-After'], '1')
+
+    def test_chunks_match_manifest(self):
+        manifest = self.manifest()
+        self.assertGreater(len(manifest['chunks']), 4)
+        status, _, body = self.request_chunks(f"version={manifest['version']}&ids=0,2-3")
+        self.assertEqual(status, 200)
+
+        offsets = chunk_offsets(manifest)
+        with open(self.model_path, 'rb') as f:
+            data = f.read()
+        expected = data[offsets[0]:offsets[1]] + data[offsets[2]:offsets[4]]
+        self.assertEqual(body, expected)
+        for index in (0, 2, 3):
+            chunk = data[offsets[index]:offsets[index + 1]]
+            self.assertEqual(chunk_digest(chunk), manifest['chunks'][index][0])
+
+    def test_bad_parameters(self):
+        version = self.manifest()['version']
+        for query in (f'version={version}&ids=x',
+                      f'version={version}&ids=3-1',
+                      f'version={version}&ids=1,1',
+                      f'version={version}&ids=999',
+                      f'version={version}',
+                      f'version={version}&ids=',
+                      f'version={version}&ids=0&ids=5',
+                      f'version={version}&version={version}&ids=0',
+                      'ids=0'):
+            self.assertEqual(self.request_chunks(query)[0], 400, query)
+
+    def test_stale_version(self):
+        version = self.manifest()['version']
+        self.assertEqual(self.request_chunks('version=0-0&ids=0')[0], 409)
+
+        # 模型被覆盖后，旧清单对应的版本号不再有效
+        stat = os.stat(self.model_path)
+        os.utime(self.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertEqual(self.request_chunks(f'version={version}&ids=0')[0], 409)
+
+    def test_model_replaced_after_manifest_lookup(self):
+        manifest = self.manifest()
+        cached = self.cache.get(self.model_path)
+        stat = os.stat(self.model_path)
+        os.utime(self.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        # 模拟读取清单与打开文件之间模型被覆盖：清单仍是旧版本，打开的文件已是新版本
+        self.cache.get = lambda model_path, timeout=0: cached
+        self.assertEqual(self.request_chunks(f"version={manifest['version']}&ids=0")[0], 409)
+
+    def test_shutdown_caches(self):
+        self.handler.shutdown_caches()
+        self.assertIsNone(self.handler.chunk_index_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -87,6 +87,9 @@ def main():
     except Exception as e:
         print(f"未知错误: {e}")
         sys.exit(1)
+    finally:
+        # 取消排队中的缩略图任务，否则进程要等它们全部完成才会退出
+        handler.shutdown_caches()
 
 if __name__ == "__main__":
     main() 
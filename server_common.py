@@ -5,7 +5,10 @@ import os
 import socket
 import sys
 from pathlib import PurePosixPath
-from urllib.parse import urlparse, unquote
+from urllib.parse import urlparse, unquote, quote, parse_qs
+
+from chunks import ChunkIndexCache, chunk_offsets, chunks_available, iter_chunk_ranges, parse_chunk_ranges
+from thumbnails import ThumbnailCache, thumbnails_available
 
 
 CONTENT_TYPES = {
@@ -104,16 +107,21 @@ def sanitize_relative_path(path):
     return str(normalized)
 
 
-def build_models_list(models_directory):
+def build_models_list(models_directory, with_thumbnails=False, with_manifests=False):
     ply_files = list_ply_files(models_directory)
     models = []
     for ply_file in ply_files:
         file_name = os.path.basename(ply_file)
         name = os.path.splitext(file_name)[0].replace('_', ' ').title()
-        models.append({
+        model = {
             'name': name,
             'path': f"models/{file_name}"
-        })
+        }
+        if with_thumbnails:
+            model['thumbnail'] = f"api/models/{quote(file_name)}/thumbnail"
+        if with_manifests:
+            model['manifest'] = f"api/models/{quote(file_name)}/manifest"
+        models.append(model)
     return models
 
 
@@ -167,6 +175,8 @@ class ModelServerHandler(http.server.SimpleHTTPRequestHandler):
     log_requests = False
     not_found_message = "File not found"
     model_not_found_message = "Model file not found"
+    thumbnail_cache = None
+    chunk_index_cache = None
 
     def _log(self, message):
         print(message)
@@ -188,6 +198,159 @@ class ModelServerHandler(http.server.SimpleHTTPRequestHandler):
             self.send_header('Pragma', 'no-cache')
             self.send_header('Expires', '0')
 
+    @classmethod
+    def shutdown_caches(cls):
+        """取消尚未开始的后台任务并丢弃缓存对象，避免退出或切换目录时还要等整个队列跑完"""
+        if cls.thumbnail_cache is not None:
+            cls.thumbnail_cache.shutdown(wait=False, cancel_futures=True)
+            cls.thumbnail_cache = None
+        if cls.chunk_index_cache is not None:
+            cls.chunk_index_cache.shutdown(wait=False, cancel_futures=True)
+            cls.chunk_index_cache = None
+
+    def _get_thumbnail_cache(self):
+        cls = type(self)
+        if cls.thumbnail_cache is None:
+            cls.thumbnail_cache = ThumbnailCache()
+        return cls.thumbnail_cache
+
+    def _get_chunk_index_cache(self):
+        cls = type(self)
+        if cls.chunk_index_cache is None:
+            cls.chunk_index_cache = ChunkIndexCache()
+        return cls.chunk_index_cache
+
+    def _resolve_ply(self, model_name):
+        file_path = resolve_model_path(model_name, self.models_directory)
+        if file_path is None or not file_path.lower().endswith('.ply'):
+            self.send_error(404, self.model_not_found_message)
+            return None
+        return file_path
+
+    def _send_cached_data(self, key, data, content_type):
+        # 仍在后台生成时立即返回，不阻塞单线程服务器，让客户端稍后重试
+        if data is None:
+            self.send_response(202)
+            self.send_header('Retry-After', '1')
+            self._send_cors_headers()
+            self._send_cache_headers()
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        # 缓存键由模型修改时间决定，可直接作为ETag
+        etag = f'"{key}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self._send_cors_headers()
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self._send_cors_headers()
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_thumbnail(self, model_name):
+        if not thumbnails_available():
+            self.send_error(503, "Thumbnails unavailable: numpy is not installed")
+            return
+
+        file_path = self._resolve_ply(model_name)
+        if file_path is None:
+            return
+
+        try:
+            key, data = self._get_thumbnail_cache().get(file_path)
+        except Exception as e:
+            self.send_error(500, f"Thumbnail generation failed: {str(e)}")
+            return
+        self._send_cached_data(key, data, 'image/png')
+
+    def _send_manifest(self, model_name):
+        if not chunks_available():
+            self.send_error(503, "Chunk manifests unavailable: numpy is not installed")
+            return
+
+        file_path = self._resolve_ply(model_name)
+        if file_path is None:
+            return
+
+        try:
+            key, data = self._get_chunk_index_cache().get(file_path)
+        except Exception as e:
+            self.send_error(500, f"Chunk manifest generation failed: {str(e)}")
+            return
+        self._send_cached_data(key, data, 'application/json')
+
+    def _send_chunks(self, model_name, query):
+        if not chunks_available():
+            self.send_error(503, "Chunk manifests unavailable: numpy is not installed")
+            return
+
+        file_path = self._resolve_ply(model_name)
+        if file_path is None:
+            return
+
+        params = parse_qs(query)
+        if len(params.get('version', [])) != 1 or len(params.get('ids', [])) != 1:
+            self.send_error(400, "Exactly one version and one ids parameter are required")
+            return
+        version = params['version'][0]
+        cache = self._get_chunk_index_cache()
+        try:
+            key, manifest = cache.get(file_path)
+        except Exception as e:
+            self.send_error(500, f"Chunk manifest generation failed: {str(e)}")
+            return
+        # 客户端持有的清单已过期，需要重新获取清单
+        if key != version:
+            self.send_error(409, "Model has changed, fetch the manifest again")
+            return
+        # 当前版本的清单仍在生成
+        if manifest is None:
+            self._send_cached_data(key, None, 'application/octet-stream')
+            return
+
+        manifest = json.loads(manifest)
+        try:
+            ranges = parse_chunk_ranges(params['ids'][0], len(manifest['chunks']))
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        offsets = chunk_offsets(manifest)
+        length = sum(offsets[last + 1] - offsets[first] for first, last in ranges)
+        try:
+            f = open(file_path, 'rb')
+        except Exception as e:
+            self.send_error(500, f"File read failed: {str(e)}")
+            return
+
+        with f:
+            # 清单生成后文件可能又被覆盖，按已打开文件的实际状态再核对一次版本
+            if cache.cache_key(file_path, os.fstat(f.fileno())) != version:
+                self.send_error(409, "Model has changed, fetch the manifest again")
+                return
+            self.send_response(200)
+            self.send_header('Content-type', 'application/octet-stream')
+            self._send_cors_headers()
+            self._send_cache_headers()
+            self.send_header('Content-Length', str(length))
+            self.end_headers()
+            # 逐段写出，不在内存中拼接整个响应
+            try:
+                for data in iter_chunk_ranges(f, manifest, ranges):
+                    self.wfile.write(data)
+            except Exception as e:
+                self._log(f"File read failed: {str(e)}")
+                self.close_connection = True
+
     def do_OPTIONS(self):
         self.send_response(200)
         self._send_cors_headers()
@@ -206,8 +369,28 @@ class ModelServerHandler(http.server.SimpleHTTPRequestHandler):
             self._send_cors_headers()
             self._send_cache_headers()
             self.end_headers()
-            models = build_models_list(self.models_directory)
+            with_thumbnails = thumbnails_available()
+            with_manifests = chunks_available()
+            models = build_models_list(self.models_directory, with_thumbnails, with_manifests)
             self.wfile.write(json.dumps(models).encode())
+            # 列表返回后立即在后台预生成缩略图和分块清单
+            if with_thumbnails:
+                self._get_thumbnail_cache().prefetch(list_ply_files(self.models_directory))
+            if with_manifests:
+                self._get_chunk_index_cache().prefetch(list_ply_files(self.models_directory))
+            return
+
+        if path.startswith('/api/models/'):
+            model_name, _, action = path[len('/api/models/'):].rpartition('/')
+            model_name = unquote(model_name)
+            if action == 'thumbnail':
+                self._send_thumbnail(model_name)
+            elif action == 'manifest':
+                self._send_manifest(model_name)
+            elif action == 'chunks':
+                self._send_chunks(model_name, parsed_url.query)
+            else:
+                self.send_error(404, self.not_found_message)
             return
 
         if path.startswith('/models/'):
@@ -0,0 +1,217 @@
+import struct
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖，缺失时缩略图功能不可用
+    np = None
+
+from model_cache import ModelFileCache
+
+
+THUMBNAIL_SIZE = 128
+THUMBNAIL_MAX_POINTS = 200000
+THUMBNAIL_SPLAT = 2
+THUMBNAIL_CACHE_DIRNAME = '.thumbnails'
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1',
+    'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2',
+    'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4',
+    'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4',
+    'double': 'f8', 'float64': 'f8',
+}
+
+COLOR_PROPERTIES = (
+    ('red', 'green', 'blue'),
+    ('diffuse_red', 'diffuse_green', 'diffuse_blue'),
+    ('r', 'g', 'b'),
+)
+
+
+def thumbnails_available():
+    return np is not None
+
+
+def read_ply_header(f):
+    """读取PLY文件头，返回 (格式, 元素列表)，文件指针停在数据区开头"""
+    if f.readline().strip() != b'ply':
+        raise ValueError("Not a PLY file")
+
+    fmt = None
+    elements = []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("PLY header is not terminated")
+        tokens = line.decode('ascii', 'replace').split()
+        if not tokens or tokens[0] in ('comment', 'obj_info'):
+            continue
+        if tokens[0] == 'end_header':
+            break
+        if tokens[0] == 'format':
+            fmt = tokens[1]
+        elif tokens[0] == 'element':
+            elements.append({'name': tokens[1], 'count': int(tokens[2]), 'properties': []})
+        elif tokens[0] == 'property' and elements:
+            if tokens[1] == 'list':
+                elements[-1]['properties'].append((tokens[4], None))
+            else:
+                elements[-1]['properties'].append((tokens[2], PLY_TYPES[tokens[1]]))
+
+    if fmt not in ('ascii', 'binary_little_endian', 'binary_big_endian'):
+        raise ValueError(f"Unsupported PLY format: {fmt}")
+    return fmt, elements
+
+
+def read_ply_points(file_path, max_points=THUMBNAIL_MAX_POINTS):
+    """按步长抽取PLY顶点，返回 (N×3 坐标, N×3 uint8 颜色或None)"""
+    with open(file_path, 'rb') as f:
+        fmt, elements = read_ply_header(f)
+        data_offset = f.tell()
+
+        skip_elements = []
+        vertex = None
+        for element in elements:
+            if element['name'] == 'vertex':
+                vertex = element
+                break
+            skip_elements.append(element)
+        if vertex is None or vertex['count'] == 0:
+            raise ValueError("PLY file has no vertices")
+        if any(dtype is None for _, dtype in vertex['properties']):
+            raise ValueError("List properties on vertices are not supported")
+
+        names = [name for name, _ in vertex['properties']]
+        count = vertex['count']
+        step = max(1, -(-count // max_points))
+
+        if fmt == 'ascii':
+            for element in skip_elements:
+                for _ in range(element['count']):
+                    f.readline()
+            rows = []
+            for index in range(count):
+                line = f.readline()
+                if index % step == 0:
+                    rows.append(line.split()[:len(names)])
+            table = np.array(rows, dtype=np.float64)
+            columns = {name: table[:, i] for i, name in enumerate(names)}
+        else:
+            for element in skip_elements:
+                if any(dtype is None for _, dtype in element['properties']):
+                    raise ValueError("Cannot skip list elements before vertices")
+                data_offset += element['count'] * sum(
+                    np.dtype(dtype).itemsize for _, dtype in element['properties'])
+            order = '<' if fmt == 'binary_little_endian' else '>'
+            dtype = np.dtype([(name, order + t) for name, t in vertex['properties']])
+            mapped = np.memmap(file_path, dtype=dtype, mode='r', offset=data_offset, shape=(count,))
+            # 复制出抽样结果后立即释放映射，避免在Windows上锁住模型文件
+            table = np.array(mapped[::step])
+            del mapped
+            columns = {name: table[name] for name in names}
+
+    if not all(axis in columns for axis in ('x', 'y', 'z')):
+        raise ValueError("PLY vertices have no x/y/z properties")
+    points = np.column_stack([columns['x'], columns['y'], columns['z']]).astype(np.float64)
+
+    colors = None
+    for keys in COLOR_PROPERTIES:
+        if all(key in columns for key in keys):
+            rgb = np.column_stack([columns[key] for key in keys]).astype(np.float64)
+            if rgb.size and rgb.max() <= 1.0 and np.issubdtype(columns[keys[0]].dtype, np.floating):
+                rgb *= 255.0
+            colors = np.clip(rgb, 0, 255).astype(np.uint8)
+            break
+    return points, colors
+
+
+def render_points(points, colors=None, size=THUMBNAIL_SIZE, splat=THUMBNAIL_SPLAT):
+    """沿最小方差轴做正交投影，用深度缓冲绘制点云，返回 size×size×4 的RGBA图像"""
+    image = np.zeros((size * size, 4), dtype=np.uint8)
+
+    finite = np.isfinite(points).all(axis=1)
+    points = points[finite]
+    if colors is None:
+        colors = np.full((len(points), 3), 200, dtype=np.uint8)
+    else:
+        colors = colors[finite]
+    if len(points) == 0:
+        return image.reshape(size, size, 4)
+
+    # 主成分分析：画面展开两个最大方差方向，沿第三个方向观察
+    centered = points - points.mean(axis=0)
+    _, axes = np.linalg.eigh(centered.T @ centered)
+    projected = centered @ axes[:, ::-1]
+    u, v, depth = projected[:, 0], projected[:, 1], projected[:, 2]
+
+    half_extent = max(np.ptp(u), np.ptp(v)) / 2.0 or 1.0
+    scale = (size - splat - 1) / 2.0 / half_extent
+    center = (size - 1) / 2.0
+    ix = np.rint((u - (u.max() + u.min()) / 2.0) * scale + center - splat / 2.0).astype(np.int64)
+    iy = np.rint(center - (v - (v.max() + v.min()) / 2.0) * scale - splat / 2.0).astype(np.int64)
+
+    # 每个点扩展为 splat×splat 的方块
+    offsets = np.arange(splat)
+    dx, dy = np.meshgrid(offsets, offsets)
+    px = (ix[None, :] + dx.reshape(-1, 1)).ravel()
+    py = (iy[None, :] + dy.reshape(-1, 1)).ravel()
+    source = np.tile(np.arange(len(points)), splat * splat)
+    inside = (px >= 0) & (px < size) & (py >= 0) & (py < size)
+    pixel = (py * size + px)[inside]
+    source = source[inside]
+
+    # 深度缓冲：同一像素只保留最近的点
+    order = np.lexsort((depth[source], pixel))
+    pixel_sorted = pixel[order]
+    nearest = np.ones(len(order), dtype=bool)
+    nearest[1:] = pixel_sorted[1:] != pixel_sorted[:-1]
+    winners = source[order[nearest]]
+
+    # 按深度做简单明暗，近处亮远处暗
+    depth_range = np.ptp(depth) or 1.0
+    shade = 1.0 - 0.4 * (depth[winners] - depth.min()) / depth_range
+    image[pixel_sorted[nearest], :3] = (colors[winners] * shade[:, None]).astype(np.uint8)
+    image[pixel_sorted[nearest], 3] = 255
+    return image.reshape(size, size, 4)
+
+
+def encode_png(rgba):
+    height, width = rgba.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6))
+            + chunk(b'IEND', b''))
+
+
+def render_thumbnail(file_path, size=THUMBNAIL_SIZE, max_points=THUMBNAIL_MAX_POINTS):
+    points, colors = read_ply_points(file_path, max_points)
+    return encode_png(render_points(points, colors, size))
+
+
+class ThumbnailCache(ModelFileCache):
+    """在后台线程中生成缩略图，并按模型的修改时间缓存到模型旁的 .thumbnails 目录"""
+
+    cache_dirname = THUMBNAIL_CACHE_DIRNAME
+    suffix = '.png'
+
+    def __init__(self, size=THUMBNAIL_SIZE, max_points=THUMBNAIL_MAX_POINTS, workers=1):
+        self.size = size
+        self.max_points = max_points
+        super().__init__(workers)
+
+    def version_tag(self):
+        return f"{self.size}:{self.max_points}"
+
+    def build(self, model_path, key):
+        return render_thumbnail(model_path, self.size, self.max_points)